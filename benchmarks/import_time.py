@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+# Import-time benchmark for the entry point.
+# Usage (from the project root):  python benchmarks/import_time.py [runs]
+#
+# Each scenario is imported in a fresh interpreter with `python -X importtime`,
+# and the cumulative microseconds of every top-level import are summed from
+# stderr. "lazy" is what `python main.py` pays today before the first prompt;
+# "eager" is the old startup, which also pulled in utils.api_handler and requests.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "lazy (import main)": "import main",
+    "eager (import main + api_handler + requests)": "import main, utils.api_handler, requests",
+}
+
+
+def measure_import_time(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+
+        # Only top-level imports (no leading indentation) so nested ones aren't counted twice
+        if parts[2].startswith(" ") and not parts[2].startswith("  "):
+            total_us += int(parts[1])
+
+    return total_us
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    results = {}
+    for name, statement in SCENARIOS.items():
+        timings = [measure_import_time(statement) for _ in range(runs)]
+        if None in timings:
+            print(f"{name:<48} skipped (import failed, is the dependency installed?)")
+            continue
+        results[name] = min(timings)
+        print(f"{name:<48} {results[name] / 1000:>8.2f} ms (best of {runs})")
+
+    if len(results) == len(SCENARIOS):
+        lazy, eager = results.values()
+        print(f"\nStartup import time saved: {(eager - lazy) / 1000:.2f} ms ({(1 - lazy / eager) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
+from utils.data_processor import (calculate_total_revenue, region_wise_sales, top_selling_products, customer_analysis,
+                                  daily_sales_trend, find_peak_sales_day, low_performing_products)
+from utils.api_handler import create_product_mapping, enrich_sales_data, save_enriched_data, generate_sales_report
+from utils.validation_rules import REQUIRED_FIELDS, apply_rules
+from utils.partial_aggregates import (build_partial, reduce_partials, aggregate_in_parallel, serialize_partial, deserialize_partial,
+                                      finalize_total_revenue, finalize_region_sales, finalize_top_products,
+                                      finalize_customer_analysis, finalize_daily_trend, finalize_peak_sales_day,
+                                      finalize_low_products)
+from utils.window_analytics import rolling_sums, moving_averages, rolling_peaks, daily_revenue_series, rolling_analytics_by
+from utils.date_keys import parse_date
+from utils.enrichment_index import load_sku_mapping, build_enrichment_index, normalize_title, trigrams, _fuzzy_match
+from utils.pipeline import run_sales_pipeline
+
+# Correctness-preserving performance regression check.
+# Usage (from the project root):  python benchmarks/regression_check.py [options]
+#
+# 1. Golden outputs: runs the batch pipeline on data/sales_data.txt with the API
+#    replaced by a local stub catalog (golden/api_products.json, with SKU mapping
+#    golden/sku_mapping.txt, so every match strategy is hit) and compares the
+#    enriched data file and the sales report with the pinned copies in golden/.
+#    The streaming pipeline (utils/pipeline.py) must produce the same files.
+# 2. Equivalence: on seeded random synthetic data, checks the optimized engines
+#    (rule engine, partial aggregates, daily series and window analytics, fuzzy
+#    title matching, date parser) against the reference code.
+# 3. Throughput: times each optimized engine against its reference code in the
+#    same run and fails when the speedup drops below MIN_SPEEDUPS, so no
+#    machine-specific baseline is needed.
+#
+# Exits with status 1 when any check fails.
+
+GOLDEN_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "golden")
+SALES_DATA = os.path.join(PROJECT_ROOT, "data", "sales_data.txt")
+SKU_MAPPING = os.path.join(GOLDEN_DIR, "sku_mapping.txt")
+STUB_CATALOG = os.path.join(GOLDEN_DIR, "api_products.json")
+
+GOLDEN_OUTPUTS = ["enriched_sales_data.txt", "sales_report.txt"]
+
+
+def stub_fetch_all_products():
+    # Stand-in for api_handler.fetch_all_products (no network access)
+    with open(STUB_CATALOG, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def normalize_output(text):
+    # The report header carries a timestamp; everything else must match exactly
+    return "\n".join(line for line in text.splitlines() if not line.strip().startswith("Generated:"))
+
+
+def run_batch_pipeline(output_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        transactions = parse_transactions(read_sales_data(SALES_DATA))
+        valid_transactions, _, _ = validate_and_filter(transactions)
+        product_mapping = create_product_mapping(stub_fetch_all_products())
+        enrichment_index = build_enrichment_index(product_mapping, load_sku_mapping(SKU_MAPPING))
+        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping, enrichment_index)
+        save_enriched_data(enriched_transactions, os.path.join(output_dir, "enriched_sales_data.txt"))
+        generate_sales_report(valid_transactions, enriched_transactions, os.path.join(output_dir, "sales_report.txt"))
+
+
+def run_streaming_pipeline(output_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        product_mapping = create_product_mapping(stub_fetch_all_products())
+        enrichment_index = build_enrichment_index(product_mapping, load_sku_mapping(SKU_MAPPING))
+        # Small batches and queues so the run actually exercises backpressure
+        run_sales_pipeline(SALES_DATA, product_mapping, enrichment_index,
+                           enriched_file=os.path.join(output_dir, "enriched_sales_data.txt"),
+                           report_file=os.path.join(output_dir, "sales_report.txt"),
+                           batch_size=8, maxsize=2)
+
+
+def check_golden_outputs(update=False):
+    failures = []
+
+    with tempfile.TemporaryDirectory() as output_dir, tempfile.TemporaryDirectory() as stream_dir:
+        run_batch_pipeline(output_dir)
+        run_streaming_pipeline(stream_dir)
+
+        for name in GOLDEN_OUTPUTS:
+            with open(os.path.join(output_dir, name), "r") as file:
+                actual = file.read()
+            with open(os.path.join(stream_dir, name), "r") as file:
+                streamed = file.read()
+
+            if normalize_output(streamed) != normalize_output(actual):
+                failures.append(f"{name}: streaming pipeline output differs from batch path")
+
+            golden_path = os.path.join(GOLDEN_DIR, name)
+            if update:
+                with open(golden_path, "w") as file:
+                    file.write(actual)
+                continue
+
+            with open(golden_path, "r") as file:
+                expected = file.read()
+
+            if normalize_output(actual) != normalize_output(expected):
+                failures.append(f"{name} differs from golden copy")
+
+    return failures
+
+
+# SYNTHETIC DATA
+
+REGIONS = ["North", "South", "East", "West"]
+PRODUCTS = ["Laptop", "Mouse", "Keyboard", "Monitor", "Webcam", "Headphones", "USB Cable", "External Hard Drive"]
+
+
+def synthetic_lines(row_count, seed):
+    rng = random.Random(seed)
+    lines = []
+
+    for i in range(row_count):
+        product = rng.randrange(len(PRODUCTS))
+        fields = [
+            f"T{i:06d}",
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            f"P{101 + product}",
+            PRODUCTS[product],
+            str(rng.randint(-1, 20)),
+            f"{rng.randint(0, 9000000) / 100:,.2f}",
+            f"C{rng.randint(1, 300):03d}",
+            rng.choice(REGIONS),
+        ]
+
+        # Sprinkle in the kinds of dirt seen in the real file
+        noise = rng.random()
+        if noise < 0.02:
+            fields[0] = "X" + fields[0][1:]
+        elif noise < 0.04:
+            fields[6] = fields[6][1:]
+        elif noise < 0.05:
+            fields[3] = fields[3] + ",Pro"
+        elif noise < 0.06:
+            fields.pop()
+        elif noise < 0.07:
+            fields[1] = rng.choice(["2024-02-30", "2024/03/01", "24-03-01", "2024-3-1"])
+
+        lines.append("|".join(fields))
+
+    return lines
+
+
+def synthetic_transactions(row_count, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        transactions = parse_transactions(synthetic_lines(row_count, seed))
+        valid_transactions, _, _ = validate_and_filter(transactions)
+    return transactions, valid_transactions
+
+
+# EQUIVALENCE CHECKS
+
+def reference_is_valid(transaction):
+    # The original if/raise validation chain, plus the date check
+    try:
+        if transaction['Quantity'] <= 0 or transaction['UnitPrice'] <= 0:
+            return False
+        if any(transaction[field] in (None, "") for field in REQUIRED_FIELDS):
+            return False
+        if not transaction['TransactionID'].startswith('T'):
+            return False
+        if not transaction['ProductID'].startswith('P'):
+            return False
+        if not transaction['CustomerID'].startswith('C'):
+            return False
+        datetime.strptime(transaction['Date'], "%Y-%m-%d")
+        return len(transaction['Date']) == 10
+    except Exception:
+        return False
+
+
+def check_rule_engine(transactions):
+    valid_rows, rejections = apply_rules(transactions)
+    expected_rows = [transaction for transaction in transactions if reference_is_valid(transaction)]
+    return valid_rows == expected_rows and sum(rejections.values()) == len(transactions) - len(expected_rows)
+
+
+def approx_equal(left, right):
+    # Structural equality with float tolerance, for comparing exact sums with the
+    # reference functions' running float sums
+    if isinstance(left, float) or isinstance(right, float):
+        return isinstance(left, (int, float)) and isinstance(right, (int, float)) and math.isclose(left, right, rel_tol=1e-9, abs_tol=1e-6)
+    if isinstance(left, dict) and isinstance(right, dict):
+        return list(left) == list(right) and all(approx_equal(left[key], right[key]) for key in left)
+    if isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)):
+        return type(left) is type(right) and len(left) == len(right) and all(map(approx_equal, left, right))
+    return left == right
+
+
+FINALIZERS = [
+    (finalize_total_revenue, calculate_total_revenue),
+    (finalize_region_sales, region_wise_sales),
+    (finalize_top_products, top_selling_products),
+    (finalize_customer_analysis, customer_analysis),
+    (finalize_daily_trend, daily_sales_trend),
+    (finalize_peak_sales_day, find_peak_sales_day),
+    (finalize_low_products, low_performing_products),
+]
+
+
+def same_partial_results(partial, expected):
+    return all(finalize(partial) == finalize(expected) for finalize, _ in FINALIZERS)
+
+
+def check_partial_aggregates(transactions, shards):
+    shard_size = max(1, -(-len(transactions) // shards))
+    partials = [
+        deserialize_partial(serialize_partial(build_partial(transactions[i:i + shard_size])))
+        for i in range(0, len(transactions), shard_size)
+    ]
+    single = build_partial(transactions)
+
+    # Sums are exact, so merged shards must match a single shard bit for bit;
+    # the reference functions add floats in row order, so they only match closely
+    return (
+        same_partial_results(reduce_partials(partials), single)
+        and all(approx_equal(finalize(single), reference(transactions)) for finalize, reference in FINALIZERS)
+    )
+
+
+def check_parallel_aggregation(transactions, shards):
+    # Process-pool map-reduce must equal a single shard as well
+    return same_partial_results(aggregate_in_parallel(transactions, shards), build_partial(transactions))
+
+
+def check_bad_dates(transactions, rng):
+    # A row with an unusable date still counts everywhere except the daily buckets
+    damaged = [dict(transaction) for transaction in transactions]
+    for transaction in rng.sample(damaged, max(1, len(damaged) // 10)):
+        transaction.pop("DateOrdinal", None)
+        transaction["Date"] = "2024-02-30"
+
+    partial = build_partial(damaged)
+    return (
+        approx_equal(finalize_total_revenue(partial), calculate_total_revenue(damaged))
+        and approx_equal(finalize_customer_analysis(partial), customer_analysis(damaged))
+        and approx_equal(finalize_daily_trend(partial), daily_sales_trend(damaged))
+    )
+
+
+def check_daily_series(transactions):
+    # Dense series built from date keys must match daily_sales_trend, with 0 on empty days
+    trend = daily_sales_trend(transactions)
+    dates, revenues = daily_revenue_series(transactions)
+    if [date for date, revenue in zip(dates, revenues) if date in trend] != list(trend):
+        return False
+    if not approx_equal(revenues, [trend[date]["revenue"] if date in trend else 0.0 for date in dates]):
+        return False
+
+    # Per-region series share one date axis and each match that region's own series
+    by_region = rolling_analytics_by(transactions, "Region", windows=(7,))
+    for region, result in by_region.items():
+        if result["dates"] != dates:
+            return False
+        rows = [transaction for transaction in transactions if transaction["Region"] == region]
+        _, region_revenues = daily_revenue_series(rows, dates[0], dates[-1])
+        if result["revenue"] != region_revenues:
+            return False
+    return True
+
+
+TITLE_WORDS = ["laptop", "charger", "wireless", "mouse", "gaming", "usb", "cable", "hd", "webcam", "pro", "mini", "65w"]
+
+
+def reference_fuzzy_match(product_mapping, name, min_similarity):
+    # Brute-force Jaccard scan over every catalog title; ties go to the lowest id
+    name_grams = trigrams(name)
+    best = None
+    for product_id, product in sorted(product_mapping.items()):
+        title = normalize_title(product.get("title"))
+        if not title:
+            continue
+        title_grams = trigrams(title)
+        similarity = len(name_grams & title_grams) / len(name_grams | title_grams)
+        if similarity >= min_similarity and (best is None or similarity > best[0]):
+            best = (similarity, product_id)
+    return best[1] if best else None
+
+
+def check_fuzzy_match(rng, queries=200):
+    # Random catalog with repeated titles (exact ties) checked against the posting-list lookup
+    titles = [" ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 30))]
+    ids = rng.sample(range(1, 1000), len(titles) * 2)
+    product_mapping = {product_id: {"title": rng.choice(titles)} for product_id in ids}
+    index = build_enrichment_index(product_mapping)
+
+    for _ in range(queries):
+        name = normalize_title(" ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 4))))
+        min_similarity = rng.choice([0.2, 0.4, 0.5, 0.6, 0.75, 1.0])
+        if _fuzzy_match(index, name, min_similarity) != reference_fuzzy_match(product_mapping, name, min_similarity):
+            return False
+    return True
+
+
+def check_date_parser(rng, count=500):
+    # parse_date must agree with datetime.strptime on valid and malformed dates
+    for _ in range(count):
+        text = f"{rng.randint(1990, 2030)}-{rng.randint(0, 13):02d}-{rng.randint(0, 32):02d}"
+        try:
+            expected = datetime.strptime(text, "%Y-%m-%d").date().toordinal()
+        except ValueError:
+            expected = None
+        if parse_date(text) != expected:
+            return False
+    return True
+
+
+def check_window_analytics(values, window):
+    sums = rolling_sums(values, window)
+    averages = moving_averages(values, window)
+    peaks = rolling_peaks(values, window)
+
+    for i in range(len(values)):
+        window_values = values[max(0, i - window + 1):i + 1]
+        if sums[i] != math.fsum(window_values):
+            return False
+        if averages[i] != math.fsum(window_values) / len(window_values):
+            return False
+        if values[peaks[i]] != max(window_values):
+            return False
+    return True
+
+
+def check_equivalence(rounds, row_count):
+    failures = []
+
+    for seed in range(rounds):
+        rng = random.Random(seed)
+        size = rng.randint(1, row_count)
+        transactions, valid_transactions = synthetic_transactions(size, seed)
+
+        if not check_rule_engine(transactions):
+            failures.append(f"rule engine: differs from reference checks (seed={seed}, rows={size})")
+
+        if valid_transactions and not check_partial_aggregates(valid_transactions, rng.randint(1, 8)):
+            failures.append(f"partial aggregates: merged result differs (seed={seed}, rows={size})")
+
+        if valid_transactions and not check_bad_dates(valid_transactions, rng):
+            failures.append(f"partial aggregates: invalid date handling differs (seed={seed}, rows={size})")
+
+        if valid_transactions and not check_daily_series(valid_transactions):
+            failures.append(f"window analytics: daily series differs from daily_sales_trend (seed={seed}, rows={size})")
+
+        if not check_fuzzy_match(rng):
+            failures.append(f"enrichment index: fuzzy match differs from brute-force scan (seed={seed})")
+
+        if not check_date_parser(rng):
+            failures.append(f"date parser: mismatch with datetime.strptime (seed={seed})")
+
+        # Cent values, where a float running total would drift from the exact window sum
+        values = [rng.randint(0, 500000) / 100 for _ in range(rng.randint(1, 400))]
+        if not check_window_analytics(values, rng.randint(1, 40)):
+            failures.append(f"window analytics: mismatch with naive rescans (seed={seed})")
+
+    # Process pools are slow to start, so the parallel path is checked once on a larger set
+    _, valid_transactions = synthetic_transactions(row_count * 4, seed=rounds)
+    if not check_parallel_aggregation(valid_transactions, shards=4):
+        failures.append(f"partial aggregates: aggregate_in_parallel differs from a single shard (rows={len(valid_transactions)})")
+
+    return failures
+
+
+# THROUGHPUT
+#
+# Each optimized engine is timed against its reference implementation on the
+# same data in the same run, and must stay at least MIN_SPEEDUPS times faster.
+# A ratio carries over between machines where absolute rows/sec do not.
+# A floor below 1 only bounds a slowdown: build_partial pays for exact sums
+# (which is what makes shards mergeable) and roughly breaks even.
+
+MIN_SPEEDUPS = {
+    "validate": 2.0,    # apply_rules vs the if/raise chain (reference_is_valid)
+    "aggregate": 0.7,   # build_partial vs the seven data_processor passes
+    "windows": 4.0,     # rolling sums/averages/peaks vs rescanning each window (365 days wide)
+    "fuzzy": 3.0,       # trigram posting index vs a Jaccard scan of every title
+}
+
+
+def reference_validate(transactions):
+    return [transaction for transaction in transactions if reference_is_valid(transaction)]
+
+
+def reference_aggregates(transactions):
+    return [reference(transactions) for _, reference in FINALIZERS]
+
+
+def optimized_windows(values, window):
+    return rolling_sums(values, window), moving_averages(values, window), rolling_peaks(values, window)
+
+
+def reference_windows(values, window):
+    windows = [values[max(0, i - window + 1):i + 1] for i in range(len(values))]
+    sums = [math.fsum(window_values) for window_values in windows]
+    averages = [total / len(window_values) for total, window_values in zip(sums, windows)]
+    peaks = [max(window_values) for window_values in windows]
+    return sums, averages, peaks
+
+
+def throughput_cases(row_count):
+    # {engine: (optimized callable, reference callable)}, each taking no arguments
+    rng = random.Random(12345)
+    transactions, valid_transactions = synthetic_transactions(row_count, seed=12345)
+    days = [rng.randint(0, 500000) / 100 for _ in range(3650)]
+
+    titles = [" ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 4))) for _ in range(100)]
+    product_mapping = {product_id: {"title": title} for product_id, title in enumerate(titles, 1)}
+    index = build_enrichment_index(product_mapping)
+    names = [normalize_title(" ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 4)))) for _ in range(500)]
+
+    return {
+        "validate": (lambda: apply_rules(transactions), lambda: reference_validate(transactions)),
+        "aggregate": (lambda: build_partial(valid_transactions), lambda: reference_aggregates(valid_transactions)),
+        "windows": (lambda: optimized_windows(days, 365), lambda: reference_windows(days, 365)),
+        "fuzzy": (
+            lambda: [_fuzzy_match(index, name, 0.4) for name in names],
+            lambda: [reference_fuzzy_match(product_mapping, name, 0.4) for name in names],
+        ),
+    }
+
+
+def best_times(optimized, reference, repeats):
+    # Best of several runs of each side, alternating between the two so that
+    # both see the same machine load; the collector is paused like in timeit
+    best = [None, None]
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            for side, function in enumerate((optimized, reference)):
+                start = time.process_time()
+                function()
+                elapsed = time.process_time() - start
+                best[side] = elapsed if best[side] is None else min(best[side], elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def check_throughput(row_count, repeats=5):
+    failures = []
+
+    for engine, (optimized, reference) in throughput_cases(row_count).items():
+        optimized_seconds, reference_seconds = best_times(optimized, reference, repeats)
+        speedup = reference_seconds / optimized_seconds if optimized_seconds else float("inf")
+
+        status = ""
+        if speedup < MIN_SPEEDUPS[engine]:
+            status = "  <-- REGRESSION"
+            failures.append(f"{engine}: {speedup:.2f}x its reference, below the required {MIN_SPEEDUPS[engine]:.1f}x")
+        print(f"  {engine:<10}{optimized_seconds:>9.3f}s vs reference {reference_seconds:>8.3f}s"
+              f"   {speedup:>6.2f}x (min {MIN_SPEEDUPS[engine]:.1f}x){status}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden output, equivalence and throughput regression checks")
+    parser.add_argument("--rounds", type=int, default=25, help="random equivalence rounds")
+    parser.add_argument("--rows", type=int, default=2000, help="max rows per equivalence round")
+    parser.add_argument("--bench-rows", type=int, default=50000, help="rows for the throughput benchmark")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per side, best one counts")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite golden output files")
+    parser.add_argument("--skip-throughput", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+
+    print("[1/3] Golden outputs...")
+    results["golden"] = check_golden_outputs(update=args.update_golden)
+
+    print("[2/3] Equivalence on synthetic data...")
+    results["equivalence"] = check_equivalence(args.rounds, args.rows)
+
+    if not args.skip_throughput:
+        print("[3/3] Throughput...")
+        results["throughput"] = check_throughput(args.bench_rows, args.repeats)
+
+    failed = False
+    for name, failures in results.items():
+        print(f"{'✓' if not failures else '✗'} {name}")
+        for failure in failures:
+            print(f"    - {failure}")
+        failed = failed or bool(failures)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
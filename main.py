@@ -1,6 +1,41 @@
+import sys
+
 from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
 from utils.data_processor import calculate_total_revenue, region_wise_sales, top_selling_products,customer_analysis, daily_sales_trend, find_peak_sales_day, low_performing_products
-from utils.api_handler import fetch_all_products, create_product_mapping, enrich_sales_data, save_enriched_data, generate_sales_report
+from utils.window_analytics import rolling_analytics
+from utils.date_keys import format_date
+
+# utils.api_handler (and requests behind it) is imported lazily in main(),
+# only once the run actually reaches the API stage
+
+def ask_filter_options():
+    region = min_amount = max_amount = start_date = end_date = None
+
+    apply_filter = input("Do you want to filter data? (y/n): ").strip().lower()
+    if apply_filter == "y":
+        region = input("Enter region (or press Enter to skip): ").strip() or None
+        if input("Do you want to apply filter by amount? (y/n): ").lower()  == "y":
+            min_amount = float(input("Enter minimum amount: "))
+            max_amount = float(input("Enter maximum amount: "))
+        if input("Do you want to apply filter by date? (y/n): ").lower()  == "y":
+            start_date = input("Enter start date YYYY-MM-DD (or press Enter to skip): ").strip() or None
+            end_date = input("Enter end date YYYY-MM-DD (or press Enter to skip): ").strip() or None
+
+    return region, min_amount, max_amount, start_date, end_date
+
+
+def print_validation_summary(summary):
+    print("Validation Summary:")
+    print(f"  Total Records   : {summary['total_input']}")
+    print(f"  Invalid Record Counts: {summary['invalid']}")
+    for rule_name, count in summary['invalid_by_rule'].items():
+        if count:
+            print(f"    - {rule_name}: {count}")
+    print(f"  Filtered By Region: {summary['filtered_by_region']}")
+    print(f"  Filtered By Amount: {summary['filtered_by_amount']}")
+    print(f"  Filtered By Date: {summary['filtered_by_date']}")
+    print(f"  Valid Records   : {summary['final_count']}")
+
 
 def main():
     try:
@@ -31,29 +66,20 @@ def main():
         amount = [transaction['Quantity'] * transaction['UnitPrice'] for transaction in transactions]
         print(f"Regions: {region}")
         print(f"Amount Range: {min(amount):,.0f} - {max(amount):,.0f}")
-
-        apply_filter = input("Do you want to filter data? (y/n): ").strip().lower()
+        dates = [transaction['DateOrdinal'] for transaction in transactions if transaction['DateOrdinal'] is not None]
+        if dates:
+            print(f"Date Range: {format_date(min(dates))} - {format_date(max(dates))}")
 
         # 5. If yes, ask for filter criteria and apply
-        region = min_amount = max_amount = None
-        if apply_filter == "y":
-            region = input("Enter region (or press Enter to skip): ").strip() or None
-            if input("Do you want to apply filter by amount? (y/n): ").lower()  == "y":
-                min_amount = float(input("Enter minimum amount: "))
-                max_amount = float(input("Enter maximum amount: "))
+        region, min_amount, max_amount, start_date, end_date = ask_filter_options()
             
         # 6. Validate transactions
         print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(transactions, region=region, min_amount=min_amount, max_amount=max_amount)
+        valid_transactions, invalid_count, summary = validate_and_filter(transactions, region=region, min_amount=min_amount, max_amount=max_amount, start_date=start_date, end_date=end_date)
         print(f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}")
 
         # 7. Display validation summary
-        print("Validation Summary:")
-        print(f"  Total Records   : {summary['total_input']}")
-        print(f"  Invalid Record Counts: {summary['invalid']}")
-        print(f"  Filtered By Region: {summary['filtered_by_region']}")
-        print(f"  Filtered By Amount: {summary['filtered_by_amount']}")
-        print(f"  Valid Records   : {summary['final_count']}")
+        print_validation_summary(summary)
 
         #  8. Perform all data analyses 
         print("\n[5/10] Analyzing sales data...")
@@ -64,33 +90,116 @@ def main():
         daily_sales_trend(valid_transactions)
         find_peak_sales_day(valid_transactions)
         low_performing_products(valid_transactions)
+        window_stats = rolling_analytics(valid_transactions, windows=(7, 30))
         print("✓ Analysis complete")
+        start, end, revenue = window_stats["windows"][7]["peak_window"]
+        if start:
+            print(f"  Peak 7-day window: {start} to {end} (Revenue: {revenue:,.2f})")
 
         # 9. Fetch products from API
         print("\n[6/10] Fetching product data from API...")
+        from utils.api_handler import fetch_all_products, create_product_mapping, enrich_sales_data, save_enriched_data, generate_sales_report
         api_products = fetch_all_products()
         print(f"✓ Fetched {len(api_products)} products")
 
         # 10. Enrich sales data with API info
         print("\n[7/10] Enriching sales data...")
+        from utils.enrichment_index import load_sku_mapping, build_enrichment_index, match_rates_by_strategy
         product_mapping = create_product_mapping(api_products)
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
+        enrichment_index = build_enrichment_index(product_mapping, load_sku_mapping("data/sku_mapping.txt"))
+        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping, enrichment_index)
         enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match'))
         success_rate = (enriched_count / len(valid_transactions)) * 100 if valid_transactions else 0
         print(f"✓ Enriched {enriched_count}/{len(valid_transactions)} transactions ({success_rate:.1f}%)")
+        for strategy, (count, rate) in match_rates_by_strategy(enriched_transactions).items():
+            print(f"  {strategy:<10}: {count} ({rate:.1f}%)")
+
+        # 11. Save enriched data and generate report (written concurrently)
+        print("\n[8/10] Saving enriched data and generating report...")
+        from utils.output_stage import write_outputs
+        enriched_file = "data/enriched_sales_data.txt"
+        report_file = "output/sales_report.txt"
+        output_timings = write_outputs({
+            enriched_file: (save_enriched_data, (enriched_transactions, enriched_file)),
+            report_file: (generate_sales_report, (valid_transactions, enriched_transactions, report_file)),
+        })
+
+        # 12. Display output locations and per-output timing
+        print("\n[9/10] Output Summary:")
+        for output_file, timing in output_timings.items():
+            if timing["error"]:
+                print(f"✗ {output_file}: {timing['error']}")
+            else:
+                print(f"✓ Saved to: {output_file} ({timing['seconds']:.3f}s)")
 
-        # 11. Save enriched data to file
-        print("\n[8/10] Saving enriched data...")
-        save_enriched_data(enriched_transactions)
-        print("✓ Saved to: data/enriched_sales_data.txt")
+        # 13. Print success message with file locations
+        failed_outputs = [output_file for output_file, timing in output_timings.items() if timing["error"]]
+        if failed_outputs:
+            print(f"\n[10/10] Process Failed: could not write {', '.join(failed_outputs)}")
+        else:
+            print("\n[10/10] Process Complete!")
+        print("=" * 40)
+
+    except Exception as e:
+        print("\nX ERROR OCCURRED")
+        print(f"Reason: {e}")
+        print("Please check inputs or data files and try again.")
+
+
+def main_streaming():
+    # Same outputs as main(), but stages run concurrently over bounded queues
+    # (python main.py --stream), so rows reach the enriched file while the
+    # input is still being read. Filter options are asked up front since the
+    # data hasn't been read yet.
+    try:
+        print("=" * 40)
+        print("SALES ANALYTICS SYSTEM (streaming)")
+        print("=" * 40)
+
+        # 1. Ask filter criteria
+        print("\n[1/5] Filter Options:")
+        region, min_amount, max_amount, start_date, end_date = ask_filter_options()
 
-        # 12. Generate comprehensive report
-        print("\n[9/10] Generating report...")
-        generate_sales_report(valid_transactions,enriched_transactions)
+        # 2. Fetch products from API and build the lookup index
+        print("\n[2/5] Fetching product data from API...")
+        from utils.api_handler import fetch_all_products, create_product_mapping
+        from utils.enrichment_index import load_sku_mapping, build_enrichment_index, match_rates
+        from utils.partial_aggregates import finalize_total_revenue, finalize_peak_sales_day
+        from utils.pipeline import run_sales_pipeline
+        api_products = fetch_all_products()
+        product_mapping = create_product_mapping(api_products)
+        enrichment_index = build_enrichment_index(product_mapping, load_sku_mapping("data/sku_mapping.txt"))
+        print(f"✓ Fetched {len(api_products)} products")
+
+        # 3. Run read -> parse -> validate/filter -> aggregate & enrich -> write
+        print("\n[3/5] Running pipeline...")
+        try:
+            result = run_sales_pipeline("data/sales_data.txt", product_mapping, enrichment_index,
+                                        region=region, min_amount=min_amount, max_amount=max_amount,
+                                        start_date=start_date, end_date=end_date)
+        except (OSError, ValueError) as e:
+            # Missing or empty sales file, or an invalid filter date
+            print(f"✗ Pipeline failed: {e}")
+            return
+        print_validation_summary(result["summary"])
+
+        print(f"\n{'Stage':<10}{'Rows In':>10}{'Rows Out':>10}{'Max Queue':>11}{'Rows/sec':>14}")
+        for stage, stage_stats in result["stats"].items():
+            print(f"{stage:<10}{stage_stats['rows_in']:>10}{stage_stats['rows_out']:>10}"
+                  f"{stage_stats['max_queue_depth']:>11}{stage_stats['rows_per_sec']:>14,.0f}")
+
+        # 4. Display aggregate and enrichment results
+        print("\n[4/5] Results:")
+        peak_date, peak_revenue, _ = finalize_peak_sales_day(result["partial"])
+        print(f"  Total Revenue: {finalize_total_revenue(result['partial']):,.2f}")
+        print(f"  Peak Sales Day: {peak_date} (Revenue: {peak_revenue:,.2f})")
+        for strategy, (count, rate) in match_rates(result["enrichment"]["strategy_counts"]).items():
+            print(f"  {strategy:<10}: {count} ({rate:.1f}%)")
+        print("✓ Saved to: data/enriched_sales_data.txt")
         print("✓ Report saved to: output/sales_report.txt")
 
-        # 13. Print success message with file locations
-        print("\n[10/10] Process Complete!")
+        # 5. Print success message
+        print("\n[5/5] Process Complete!")
         print("=" * 40)
 
     except Exception as e:
@@ -100,5 +209,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if "--stream" in sys.argv[1:]:
+        main_streaming()
+    else:
+        main()
 
@@ -1,7 +1,16 @@
-import requests
 from datetime import datetime
 
+from utils.date_keys import format_date
+from utils.enrichment_index import build_enrichment_index, lookup_product, count_match_strategies, match_rates
+from utils.exact_sum import sum_value
+from utils.partial_aggregates import build_partial
+from utils.file_handler import atomic_write
+
 def fetch_all_products():
+    # requests (and its urllib3/charset dependency tree) is imported here, not at
+    # module level, so runs that never reach the API stage don't pay for it
+    import requests
+
     try:
         response = requests.get('https://dummyjson.com/products?limit=100')
 
@@ -62,54 +71,71 @@ def create_product_mapping(api_products):
     return product_mapping
 
 
+ENRICHED_HEADERS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region",
+    "API_Category", "API_Brand", "API_Rating", "API_Match"
+]
+
+
+def format_enriched_row(transaction):
+    row = []
+    for field in ENRICHED_HEADERS:
+        value = transaction.get(field)
+        row.append("" if value is None else str(value))
+    return "|".join(row) + "\n"
+
+
 def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
-    headers = [
-        "TransactionID", "Date", "ProductID", "ProductName",
-        "Quantity", "UnitPrice", "CustomerID", "Region",
-        "API_Category", "API_Brand", "API_Rating", "API_Match"
-    ]
     try:
-        # Open the file in write mode
-        with open(filename, "w") as file:
+        # Write to a temporary file and rename it into place when complete
+        with atomic_write(filename) as file:
             # Write header
-            file.write("|".join(headers) + "\n")
+            file.write("|".join(ENRICHED_HEADERS) + "\n")
 
             for transaction in enriched_transactions:
-                row = []
-                for field in headers:
-                    value = transaction.get(field)
-                    row.append("" if value is None else str(value))
-                file.write("|".join(row) + "\n")
+                file.write(format_enriched_row(transaction))
 
         print(f"SUCCESS: Enriched data saved to {filename}")
 
     except IOError as e:
         print(f"ERROR: Failed to write enriched file → {e}")
+        raise
 
 
-def enrich_sales_data(transactions, product_mapping):
+def enrich_sales_data(transactions, product_mapping, enrichment_index=None, match_cache=None):
     enrich_transactions = []
 
+    # Without a prebuilt index, only the numeric product ID (P101 -> 101) is matched
+    if enrichment_index is None:
+        enrichment_index = build_enrichment_index(product_mapping, title_keys=False)
+
+    # Lookups are cached per distinct product, not repeated for every row;
+    # pass the same match_cache across calls to share it between batches
+    matches = {} if match_cache is None else match_cache
+
     for transaction in transactions:
         enrich_trans = transaction.copy()
 
-        product_id = transaction.get("ProductID", "")
-        # Extract numeric product ID
-        numeric_prouduct_id = int(product_id[1:]) if product_id.startswith("P") else None
-
-        api_product = product_mapping.get(numeric_prouduct_id)
+        product_key = (transaction.get("ProductID", ""), transaction.get("ProductName", ""))
 
         try: 
+            if product_key not in matches:
+                matches[product_key] = lookup_product(enrichment_index, *product_key)
+            api_product, strategy = matches[product_key]
+
             if api_product:
                 enrich_trans["API_Category"] = api_product.get("category")
                 enrich_trans["API_Brand"] = api_product.get("brand")
                 enrich_trans["API_Rating"] = api_product.get("rating")
                 enrich_trans["API_Match"] = True
+                enrich_trans["API_MatchStrategy"] = strategy
             else:
                 enrich_trans["API_Category"] = None
                 enrich_trans["API_Brand"] = None
                 enrich_trans["API_Rating"] = None
                 enrich_trans["API_Match"] = False
+                enrich_trans["API_MatchStrategy"] = None
                 
         except Exception:
             # Graceful failure
@@ -117,32 +143,61 @@ def enrich_sales_data(transactions, product_mapping):
             enrich_trans["API_Brand"] = None
             enrich_trans["API_Rating"] = None
             enrich_trans["API_Match"] = False
+            enrich_trans["API_MatchStrategy"] = None
 
         enrich_transactions.append(enrich_trans)
 
     return enrich_transactions
 
 
+def new_enrichment_summary():
+    # Row counts the report needs from enrichment, so rows don't have to be kept around
+    return {
+        "total": 0,
+        "enriched_count": 0,
+        "strategy_counts": count_match_strategies([]),
+        # dict keeps first-seen order, so the report is reproducible run to run (a set isn't)
+        "failed_products": {},
+    }
+
+
+def add_enrichment_summary(summary, enriched_transactions):
+    for transaction in enriched_transactions:
+        summary["total"] += 1
+        if transaction["API_Match"] == True:
+            summary["enriched_count"] += 1
+        else: summary["failed_products"][transaction["ProductName"]] = None
+
+    count_match_strategies(enriched_transactions, summary["strategy_counts"])
+    return summary
+
+
+def summarize_enrichment(enriched_transactions):
+    return add_enrichment_summary(new_enrichment_summary(), enriched_transactions)
+
+
 def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+    return write_sales_report(build_partial(transactions), summarize_enrichment(enriched_transactions), output_file)
+
+
+def write_sales_report(partial, enrichment_summary, output_file='output/sales_report.txt'):
+    # Same report as generate_sales_report, from aggregates instead of rows.
+    # partial: partial_aggregates.build_partial of the valid transactions;
+    # enrichment_summary: summarize_enrichment of the enriched transactions.
+    # Both are bounded by distinct keys, not rows, so the streaming pipeline can
+    # write the report without keeping every row.
+
     # Overall Summary Metrics
-    total_transactions = len(transactions)
-    total_revenue = sum(transaction['Quantity'] * transaction['UnitPrice'] for transaction in transactions)
+    total_transactions = partial["transaction_count"]
+    total_revenue = sum_value(partial["total_revenue"])
     avg_order_value = total_revenue / total_transactions if total_transactions else 0
-    dates= sorted(transaction['Date'] for transaction in transactions)
-    date_range = f"{dates[0]} to {dates[-1]}" if dates else None
+    dates = partial["days"]
+    date_range = f"{format_date(min(dates))} to {format_date(max(dates))}" if dates else None
 
     # Region-Wise Performance Metrics
     region_stats = {}
-
-    for transaction in transactions:
-        region = transaction['Region']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-
-        if region not in region_stats:
-            region_stats[region] = {'total_sales': 0.0, 'transaction_count': 0}
-
-        region_stats[region]['total_sales'] += amount
-        region_stats[region]['transaction_count'] += 1
+    for region, data in partial["regions"].items():
+        region_stats[region] = {'total_sales': sum_value(data['total_sales']), 'transaction_count': data['transaction_count']}
 
     region_wise_summary = []
     for region, data in region_stats.items():
@@ -153,20 +208,11 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
 
     # Top 5 Products Metrics 
     product_stats = {}
-
-    for transaction in transactions:
-            productName = transaction['ProductName']
-            quantity = transaction['Quantity']
-            amount = transaction['Quantity'] * transaction['UnitPrice']
-            
-            if productName not in product_stats:
-                product_stats[productName] = {
-                    "total_quantity": 0,
-                    "total_revenue": 0.0
-                }
-
-            product_stats[productName]["total_quantity"] += quantity
-            product_stats[productName]["total_revenue"] += amount
+    for productName, data in partial["products"].items():
+        product_stats[productName] = {
+            "total_quantity": data["total_quantity"],
+            "total_revenue": sum_value(data["total_revenue"])
+        }
 
     top_products = sorted(
         product_stats.items(),
@@ -176,20 +222,11 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
 
     # Top 5 Customer Metrics
     customer_summary = {}
-
-    for transaction in transactions:
-        customer = transaction['CustomerID']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-        productName = transaction['ProductName']
-
-        if customer not in customer_summary:
-                customer_summary[customer] = {
-                    "total_spent": 0.0,
-                    "purchase_count": 0,
-                }
-
-        customer_summary[customer]["total_spent"] += amount
-        customer_summary[customer]["purchase_count"] += 1
+    for customer, data in partial["customers"].items():
+        customer_summary[customer] = {
+            "total_spent": sum_value(data["total_spent"]),
+            "purchase_count": data["purchase_count"],
+        }
 
     top_customers = sorted(
         customer_summary.items(),
@@ -199,32 +236,18 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
 
     # Daily Sales Trend Metrics
     daily_summary = {}
-
-    for transaction in transactions:
-        date = transaction['Date']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-        customer = transaction['CustomerID']
-
-        if date not in daily_summary:
-                daily_summary[date] = {
-                    "revenue": 0.0,
-                    "transaction_count": 0,
-                    "customers": set(),
-                }
-
-        daily_summary[date]["revenue"] += amount
-        daily_summary[date]["transaction_count"] += 1
-        daily_summary[date]["customers"].add(customer)
-
-    for date in daily_summary:
-        daily_summary[date]["unique_customers"] = len(daily_summary[date]["customers"])
-        del daily_summary[date]["customers"]
+    for date, data in partial["days"].items():
+        daily_summary[date] = {
+            "revenue": sum_value(data["revenue"]),
+            "transaction_count": data["transaction_count"],
+            "unique_customers": len(data["customers"]),
+        }
 
     daily_sales_trend = sorted(daily_summary.items())
 
     # Product Performance Analysis
     # Best selling day
-    best_selling_day = max(sorted(daily_summary.items(), key=lambda item: item[1]["revenue"]))
+    best_selling_day = max(sorted(daily_summary.items(), key=lambda item: item[1]["revenue"])) if daily_summary else None
 
     # Low performing products 
     # Since threshold for detrming the low performing products is not given, 
@@ -241,19 +264,16 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
 
     # API ENRICHMENT SUMMARY
     # Total products enriched count and List of products that couldn't be enriched
-    enriched_count = 0
-    failed_products = set()
-    for transaction in enriched_transactions:
-        if transaction["API_Match"] == True:
-            enriched_count += 1
-        else: failed_products.add(transaction["ProductName"])
+    enriched_count = enrichment_summary["enriched_count"]
+    failed_products = enrichment_summary["failed_products"]
     
     # Success rate percentage
-    success_rate = (enriched_count / len(enriched_transactions) ) * 100 if enriched_transactions else 0
+    success_rate = (enriched_count / enrichment_summary["total"]) * 100 if enrichment_summary["total"] else 0
+    strategy_rates = match_rates(enrichment_summary["strategy_counts"])
 
     # WRITE REPORT
     try:
-        with open(output_file, 'w')as file:
+        with atomic_write(output_file) as file:
             # HEADER
             file.write("=" * 50 + "\n")
             file.write("       SALES ANALYTICS REPORT\n")
@@ -298,13 +318,16 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
             file.write("-" * 50 + "\n")
             file.write(f"{'Date':<15}{'Revenue':>8}{'Transactions':>15}{'Unique Customers':>20}\n")
             for i, (p, d) in enumerate(daily_sales_trend, 1):
-                file.write(f"{p:<15} {d['revenue']:>8} {d['transaction_count']:>8}{d['unique_customers']:>16}\n")
+                file.write(f"{format_date(p):<15} {d['revenue']:>8} {d['transaction_count']:>8}{d['unique_customers']:>16}\n")
             file.write("\n")
 
             # PRODUCT PERFORMANCE ANALYSIS
             file.write("PRODUCT PERFORMANCE ANALYSIS\n")
             file.write("-" * 50 + "\n")
-            file.write(f"Best Selling Day: {best_selling_day[0]} (Revenue: {best_selling_day[1]['revenue']:,.2f})\n\n")
+            if best_selling_day:
+                file.write(f"Best Selling Day: {format_date(best_selling_day[0])} (Revenue: {best_selling_day[1]['revenue']:,.2f})\n\n")
+            else:
+                file.write("Best Selling Day: None\n\n")
             file.write(f"Low performing products:\n")
             file.write(f"{'Rank':6}{'Product Name':<20}{'Quantity Sold':>15}{'Revenue':>15}\n")
             for i, (p, d) in enumerate(low_performing_products, 1):
@@ -320,12 +343,16 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
             file.write("-" * 50 + "\n")
             file.write(f"Total products enriched: {enriched_count}\n")
             file.write(f"Success rate percentage: {success_rate:.2f}\n")
+            file.write(f"Match rate by strategy:\n")
+            for strategy, (count, rate) in strategy_rates.items():
+                file.write(f" - {strategy:<10}{count:>6}{rate:>9.2f}%\n")
             file.write(f"List of products that couldn't be enriched:\n")
             for p in failed_products:
                 file.write(f" - {p}\n")
         print(f"SUCCESS: Sales report generated at {output_file}")
     except IOError as e:
         print(f"ERROR: Failed to write sales report file → {e}")
+        raise
 
 
 
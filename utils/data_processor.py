@@ -1,3 +1,6 @@
+from utils.date_keys import date_key, format_date
+
+
 def calculate_total_revenue(transactions):
     total_revenue = 0.0
 
@@ -139,7 +142,7 @@ def daily_sales_trend(transactions):
     # Aggregate daily revenue, daily transactions count per day
     for transaction in transactions:
         try:
-            date = transaction['Date']
+            date = date_key(transaction)
             amount = transaction['Quantity'] * transaction['UnitPrice']
             customer = transaction['CustomerID']
 
@@ -163,8 +166,8 @@ def daily_sales_trend(transactions):
         daily_summary[date]["unique_customers"] = len(daily_summary[date]["customers"])
         del daily_summary[date]["customers"]
 
-    # Sort chronologically by date
-    sorted_daily_summary = dict(sorted(daily_summary.items()))
+    # Sort chronologically by integer date key, then label with YYYY-MM-DD
+    sorted_daily_summary = {format_date(date): summary for date, summary in sorted(daily_summary.items())}
 
     return sorted_daily_summary
 
@@ -175,7 +178,7 @@ def find_peak_sales_day(transactions):
     # Aggregate daily revenue, daily transactions count per day
     for transaction in transactions:
         try:
-            date = transaction['Date']
+            date = date_key(transaction)
             amount = transaction['Quantity'] * transaction['UnitPrice']
 
             if date not in daily_sales_summary:
@@ -199,7 +202,7 @@ def find_peak_sales_day(transactions):
     for date in daily_sales_summary:
         if daily_sales_summary[date]["revenue"] > peak_revenue:
             peak_revenue = daily_sales_summary[date]["revenue"]
-            peak_date = date
+            peak_date = format_date(date)
             peak_transcation = daily_sales_summary[date]["transaction_count"]
 
     return (peak_date, peak_revenue, peak_transcation)
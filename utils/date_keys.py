@@ -0,0 +1,40 @@
+from datetime import date
+from functools import lru_cache
+
+# Dates are parsed once at ingest into proleptic Gregorian ordinals (plain ints),
+# so grouping, sorting and range filtering compare integers instead of strings.
+# A sales file only has a few hundred distinct dates, so both directions are cached.
+
+
+@lru_cache(maxsize=8192)
+def parse_date(text):
+    # Fast parser for the YYYY-MM-DD layout, returns the date ordinal or None if invalid
+    if type(text) is not str or len(text) != 10 or text[4] != "-" or text[7] != "-":
+        return None
+
+    year, month, day = text[0:4], text[5:7], text[8:10]
+    if not (year + month + day).isascii() or not (year + month + day).isdigit():
+        return None
+
+    try:
+        return date(int(year), int(month), int(day)).toordinal()
+    except ValueError:
+        # e.g. 2024-02-30
+        return None
+
+
+@lru_cache(maxsize=8192)
+def format_date(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def date_key(transaction):
+    # Integer date key of a transaction, raises ValueError if it has no valid date
+    ordinal = transaction.get("DateOrdinal")
+
+    if ordinal is None:
+        ordinal = parse_date(transaction.get("Date"))
+        if ordinal is None:
+            raise ValueError(f"Invalid date: {transaction.get('Date')!r}")
+
+    return ordinal
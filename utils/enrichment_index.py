@@ -0,0 +1,156 @@
+import re
+
+# Enrichment lookup index, built once per catalog fetch.
+#
+# Besides the API id (P101 -> 101), products can be matched through:
+#   sku   - explicit ProductID -> API id mapping file (data/sku_mapping.txt)
+#   title - normalized ProductName equal to a normalized API title
+#   fuzzy - closest API title by character trigram similarity
+# Strategies are tried in the order of MATCH_STRATEGIES; the first hit wins.
+
+MATCH_STRATEGIES = ["sku", "id", "title", "fuzzy"]
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(text):
+    # "Laptop,Premium " -> "laptop premium"
+    if not text:
+        return ""
+    return _NON_ALPHANUMERIC.sub(" ", str(text).lower()).strip()
+
+
+def trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_sku_mapping(filename='data/sku_mapping.txt'):
+    # Pipe-delimited "ProductID|API_ID" lines; header, blank and '#' lines are skipped
+    sku_mapping = {}
+
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        return sku_mapping
+
+    for line in lines[1:]:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        parts = line.split("|")
+        if len(parts) != 2 or not parts[1].strip().isdigit():
+            print(f"Skipping invalid SKU mapping line: {line}")
+            continue
+
+        sku_mapping[parts[0].strip()] = int(parts[1].strip())
+
+    return sku_mapping
+
+
+def build_enrichment_index(product_mapping, sku_mapping=None, title_keys=True):
+    # product_mapping is the output of api_handler.create_product_mapping (API id -> details);
+    # title_keys=False leaves out the title and fuzzy lookups
+    index = {
+        "by_id": product_mapping,
+        "sku": sku_mapping or {},
+        "by_title": {},
+        "title_grams": {},
+        "gram_postings": {},
+    }
+
+    if not title_keys:
+        return index
+
+    for product_id, product in product_mapping.items():
+        title = normalize_title(product.get("title"))
+        if not title:
+            continue
+
+        # First product with a given title wins, same as the API listing order
+        index["by_title"].setdefault(title, product_id)
+
+        grams = trigrams(title)
+        index["title_grams"][product_id] = grams
+        for gram in grams:
+            index["gram_postings"].setdefault(gram, set()).add(product_id)
+
+    return index
+
+
+def _fuzzy_match(index, name, min_similarity):
+    grams = trigrams(name)
+
+    # Count shared trigrams only for catalog titles that share at least one
+    shared = {}
+    for gram in grams:
+        for product_id in index["gram_postings"].get(gram, ()):
+            shared[product_id] = shared.get(product_id, 0) + 1
+
+    best = None
+    for product_id, count in shared.items():
+        # Jaccard similarity of the two trigram sets
+        similarity = count / (len(grams) + len(index["title_grams"][product_id]) - count)
+        if similarity < min_similarity:
+            continue
+
+        # Highest similarity wins; ties go to the lowest API id so results are stable
+        if best is None or (similarity, -product_id) > (best[0], -best[1]):
+            best = (similarity, product_id)
+
+    return best[1] if best else None
+
+
+def lookup_product(index, product_id, product_name, min_similarity=0.6):
+    # Returns (api product details, strategy name), or (None, None) if nothing matches
+    product_id = product_id or ""
+
+    api_id = index["sku"].get(product_id)
+    if api_id in index["by_id"]:
+        return index["by_id"][api_id], "sku"
+
+    if product_id.startswith("P") and product_id[1:].isdigit():
+        api_product = index["by_id"].get(int(product_id[1:]))
+        if api_product:
+            return api_product, "id"
+
+    name = normalize_title(product_name)
+    if not name:
+        return None, None
+
+    if name in index["by_title"]:
+        return index["by_id"][index["by_title"][name]], "title"
+
+    api_id = _fuzzy_match(index, name, min_similarity)
+    if api_id is not None:
+        return index["by_id"][api_id], "fuzzy"
+
+    return None, None
+
+
+def count_match_strategies(enriched_transactions, counts=None):
+    # Rows matched per strategy, plus "unmatched"; pass `counts` to keep adding to it batch by batch
+    if counts is None:
+        counts = {strategy: 0 for strategy in MATCH_STRATEGIES}
+        counts["unmatched"] = 0
+
+    for transaction in enriched_transactions:
+        strategy = transaction.get("API_MatchStrategy") or "unmatched"
+        counts[strategy] = counts.get(strategy, 0) + 1
+
+    return counts
+
+
+def match_rates(counts):
+    # {strategy: (matched rows, % of all rows)} from count_match_strategies output
+    total = sum(counts.values())
+    return {
+        strategy: (count, (count / total) * 100 if total else 0)
+        for strategy, count in counts.items()
+    }
+
+
+def match_rates_by_strategy(enriched_transactions):
+    return match_rates(count_match_strategies(enriched_transactions))
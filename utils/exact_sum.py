@@ -0,0 +1,23 @@
+# Exact, mergeable float summation.
+#
+# An exact sum is a plain int counting units of 2**-1074, the smallest step
+# between floats, so every finite float converts to it without loss and int
+# addition never rounds. Totals therefore do not depend on the order values were
+# added in or on how the data was split: sums built on different shards add up
+# to exactly the single-pass value. Only sum_value() rounds, once, to the
+# nearest float (int true division is correctly rounded). JSON stores ints exactly.
+
+_UNIT_BITS = 1074
+_UNIT = 1 << _UNIT_BITS
+
+
+def to_exact(value):
+    # float (or int) -> exact sum of just that value
+    numerator, denominator = value.as_integer_ratio()
+    # denominator is a power of two, at most 2**1074
+    return numerator << (_UNIT_BITS + 1 - denominator.bit_length())
+
+
+def sum_value(total):
+    # Correctly rounded float of an exact sum
+    return total / _UNIT
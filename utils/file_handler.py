@@ -1,3 +1,11 @@
+import os
+import threading
+from contextlib import contextmanager
+from operator import itemgetter, mul
+
+from utils.date_keys import parse_date, date_key
+from utils.validation_rules import apply_rules
+
 def read_sales_data(filename):
     encodings = ["utf-8", "latin-1", "cp1252"]
 
@@ -34,10 +42,52 @@ def read_sales_data(filename):
     return cleaned_lines
 
 
-def parse_transactions(raw_lines):
+def iter_sales_data(filename, batch_size=1000):
+    # Streaming counterpart of read_sales_data: yields lists of cleaned lines without
+    # loading the whole file. Encoding fallback is applied per line instead of per
+    # file, which only differs for files that mix encodings.
+    # Unlike read_sales_data it raises instead of returning nothing, so a missing
+    # (OSError) or empty (ValueError) source fails a pipeline rather than producing
+    # empty outputs.
+    encodings = ["utf-8", "latin-1", "cp1252"]
+    found_data = False
+
+    with open(filename, "rb") as file:
+        # Skip header
+        file.readline()
+
+        batch = []
+        for raw_line in file:
+            for encoding in encodings:
+                try:
+                    line = raw_line.decode(encoding).strip()
+                    break
+                except UnicodeDecodeError:
+                    continue
+            else:
+                continue
+
+            # Skip empty lines
+            if not line:
+                continue
+
+            batch.append(line)
+            found_data = True
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    if not found_data:
+        raise ValueError(f"No sales data found in {filename}")
+
+
+def parse_transactions(raw_lines, first_line_no=1):
     parsed_data = []
 
-    for line_no, line in enumerate(raw_lines, start=1):
+    for line_no, line in enumerate(raw_lines, start=first_line_no):
         try:
             # Split by pipe delimiter
             part_data = line.split('|')
@@ -56,6 +106,7 @@ def parse_transactions(raw_lines):
             record = {
                 "TransactionID": transaction_id.strip(),
                 "Date": date.strip(),
+                "DateOrdinal": parse_date(date.strip()), # integer date key, None if invalid
                 "ProductID": product_id.strip(),
                 "ProductName": product_name.replace(",", " ").strip(),
                 "Quantity": int(quantity.replace(",", "").strip()), #convert to int 
@@ -72,82 +123,112 @@ def parse_transactions(raw_lines):
     return parsed_data
 
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
-    regions = set()
-    amounts = []
+def build_filters(region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+    # {summary key: predicate} for each requested filter, in the order they are applied
+    filters = {}
+
+    if region is not None:
+        region_name = region.capitalize()
+        filters["filtered_by_region"] = lambda transaction: transaction['Region'] == region_name
+
+    if min_amount is not None and max_amount is not None:
+        filters["filtered_by_amount"] = lambda transaction: min_amount <= transaction['Quantity'] * transaction['UnitPrice'] <= max_amount
+
+    # Date range is YYYY-MM-DD with either end optional, compared as integer date keys
+    if start_date is not None or end_date is not None:
+        first = parse_date(start_date) if start_date is not None else None
+        last = parse_date(end_date) if end_date is not None else None
+        if (start_date is not None and first is None) or (end_date is not None and last is None):
+            raise ValueError(f"Invalid date range: {start_date} to {end_date} (expected YYYY-MM-DD)")
+
+        filters["filtered_by_date"] = lambda transaction: (
+            (first is None or date_key(transaction) >= first) and (last is None or date_key(transaction) <= last)
+        )
 
-    valid_transactions = []
-    invalid_count = 0
+    return filters
+
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
     summary = {
         'total_input': len(transactions),
         'invalid': 0,
+        'invalid_by_rule': {},
         'filtered_by_region': 0,
         'filtered_by_amount': 0,
+        'filtered_by_date': 0,
         'final_count': 0
     }
 
     # Display available regions and transaction amount range
-    for transaction in transactions:
-        if "Region" in transaction:
-            regions.add(transaction['Region'])
-        if "Quantity" in transaction and "UnitPrice" in transaction:
-            amounts.append(transaction['Quantity'] * transaction['UnitPrice'])
+    try:
+        # Every parsed record has these fields, so map over them at C speed
+        regions = set(map(itemgetter('Region'), transactions))
+        amounts = list(map(mul, map(itemgetter('Quantity'), transactions), map(itemgetter('UnitPrice'), transactions)))
+    except (KeyError, TypeError):
+        regions = {transaction['Region'] for transaction in transactions if "Region" in transaction}
+        amounts = [
+            transaction['Quantity'] * transaction['UnitPrice']
+            for transaction in transactions
+            if "Quantity" in transaction and "UnitPrice" in transaction
+        ]
 
     print("Available Regions:", sorted(regions))
 
     if amounts:
         print(f"Transaction Amount Range: {min(amounts)} to {max(amounts)}")
 
-    # Validation of records
-    for transaction in transactions:
-        try:
-            if transaction['Quantity'] <= 0:
-                raise ValueError("Invalid Quantity")
-            if transaction['UnitPrice'] <= 0:
-                raise ValueError("Invalid Unit Price")
-            # Skip rows with missing field value
-            if not all(["TransactionID", "Date", "ProductID", "ProductName", "Quantity", "UnitPrice", "CustomerID", "Region"]):
-                raise ValueError("Missing required field")
-            if not transaction['TransactionID'].startswith('T'):
-                raise ValueError("Invalid TransactionID")
-            if not transaction['ProductID'].startswith('P'):
-                 raise ValueError("Invalid ProductID")
-            if not transaction['CustomerID'].startswith('C'): 
-                raise ValueError("Invalid CustomerID")
-            valid_transactions.append(transaction)
-            
-        except:
-            invalid_count += 1
+    # Validation of records (see utils/validation_rules.py for the rule set)
+    valid_transactions, rejections = apply_rules(transactions)
+    invalid_count = len(transactions) - len(valid_transactions)
 
     summary['invalid'] = invalid_count
+    summary['invalid_by_rule'] = rejections
 
     print(f"After validation: {len(valid_transactions)}")
 
+    filters = build_filters(region, min_amount, max_amount, start_date, end_date)
+
     # Filter by Region
-    if region is not None:
+    if "filtered_by_region" in filters:
         before = len(valid_transactions)
-        valid_transactions = [transaction for transaction in valid_transactions if transaction['Region'] == region.capitalize()]
+        valid_transactions = [transaction for transaction in valid_transactions if filters["filtered_by_region"](transaction)]
         summary['filtered_by_region'] = before - len(valid_transactions)
 
     print(f"After region filter ({region}): {len(valid_transactions)}")
 
     # Filter by amount
-    if min_amount is not None and max_amount is not None:
+    if "filtered_by_amount" in filters:
         before = len(valid_transactions)
-        amount_filter = []
-        for transaction in valid_transactions:
-            amount = transaction['Quantity'] * transaction['UnitPrice']
-
-            if amount is not None and amount < min_amount:
-                continue
-            if amount is not None and amount > max_amount:
-                continue
-
-            amount_filter.append(transaction)
-        valid_transactions = amount_filter
+        valid_transactions = [transaction for transaction in valid_transactions if filters["filtered_by_amount"](transaction)]
         summary["filtered_by_amount"] = before - len(valid_transactions)
 
     print(f"After amount filter ({min_amount}-{max_amount}): {len(valid_transactions)}")
 
-    summary["final_count"] = len(transactions) - invalid_count - summary['filtered_by_region'] - summary["filtered_by_amount"]
+    # Filter by date range
+    if "filtered_by_date" in filters:
+        before = len(valid_transactions)
+        valid_transactions = [transaction for transaction in valid_transactions if filters["filtered_by_date"](transaction)]
+        summary["filtered_by_date"] = before - len(valid_transactions)
+
+    print(f"After date filter ({start_date} to {end_date}): {len(valid_transactions)}")
+
+    summary["final_count"] = len(transactions) - invalid_count - summary['filtered_by_region'] - summary["filtered_by_amount"] - summary["filtered_by_date"]
     return valid_transactions, invalid_count, summary
+
+
+@contextmanager
+def atomic_write(filename, buffer_size=64 * 1024):
+    # Write to a temporary file next to the target, then rename it into place,
+    # so a partially written file is never visible under the final name
+    temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        with open(temp_filename, "w", buffering=buffer_size) as file:
+            yield file
+        os.replace(temp_filename, filename)
+
+    except BaseException:
+        # Leave the previous version of the file untouched
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
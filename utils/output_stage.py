@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _timed_output(writer, args, kwargs):
+    start = time.perf_counter()
+    error = None
+
+    try:
+        writer(*args, **kwargs)
+    except Exception as e:
+        error = e
+
+    return {"seconds": time.perf_counter() - start, "error": error}
+
+
+def write_outputs(outputs, max_workers=None):
+    # Run every output writer at the same time so slow disk / network filesystem
+    # I/O overlaps instead of adding up.
+    # `outputs` maps an output name to (writer function, args) or (writer function, args, kwargs).
+    # Writers are expected to write atomically (see file_handler.atomic_write) and
+    # to raise on failure; the exception is reported in the timing entry.
+    # Returns per-output timing: {name: {"seconds": float, "error": Exception or None}}
+    if not outputs:
+        return {}
+
+    timings = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(outputs)) as executor:
+        futures = {}
+        for name, job in outputs.items():
+            writer, args = job[0], job[1]
+            kwargs = job[2] if len(job) > 2 else {}
+            futures[name] = executor.submit(_timed_output, writer, args, kwargs)
+
+        for name, future in futures.items():
+            timings[name] = future.result()
+
+    return timings
@@ -0,0 +1,256 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.date_keys import date_key, format_date
+from utils.exact_sum import to_exact, sum_value
+
+# Mergeable partial aggregates.
+#
+# The functions in data_processor.py return final results (percentages, averages,
+# sorted dicts) that can't be combined across data partitions. A partial aggregate
+# keeps only sums, counts and distinct-sets per region / product / customer / day,
+# so partials built from different shards (cores or machines) can be merged and
+# then finalized into the same results as a single-node run.
+#
+# Money amounts are accumulated exactly (utils/exact_sum.py) and only rounded
+# when finalizing, so merged shards give exactly what build_partial gives on all
+# rows at once, no matter how the rows were split. (data_processor.py adds floats
+# in row order, so its results can differ from these in the last digits.)
+# Merging keeps first-seen key order, so merging shards in input order also
+# reproduces the tie ordering.
+
+
+def new_partial():
+    return {
+        "total_revenue": 0,
+        "transaction_count": 0,
+        "regions": {},
+        "products": {},
+        "customers": {},
+        "days": {},
+    }
+
+
+def add_transaction(partial, transaction):
+    try:
+        region = transaction['Region']
+        productName = transaction['ProductName']
+        customer = transaction['CustomerID']
+        quantity = transaction['Quantity']
+        amount = to_exact(transaction['Quantity'] * transaction['UnitPrice'])
+
+    except (ValueError, TypeError, OverflowError):
+        # Skip malformed records safely
+        return partial
+
+    try:
+        date = date_key(transaction)
+    except ValueError:
+        # A bad date only keeps the row out of the daily buckets
+        date = None
+
+    partial["total_revenue"] += amount
+    partial["transaction_count"] += 1
+
+    # One lookup per group; a first-seen key starts from this row's values
+    regions = partial["regions"]
+    if region in regions:
+        data = regions[region]
+        data["total_sales"] += amount
+        data["transaction_count"] += 1
+    else:
+        regions[region] = {"total_sales": amount, "transaction_count": 1}
+
+    products = partial["products"]
+    if productName in products:
+        data = products[productName]
+        data["total_quantity"] += quantity
+        data["total_revenue"] += amount
+    else:
+        products[productName] = {"total_quantity": quantity, "total_revenue": amount}
+
+    customers = partial["customers"]
+    if customer in customers:
+        data = customers[customer]
+        data["total_spent"] += amount
+        data["purchase_count"] += 1
+        data["products_bought"].add(productName)
+    else:
+        customers[customer] = {"total_spent": amount, "purchase_count": 1, "products_bought": {productName}}
+
+    if date is None:
+        return partial
+
+    days = partial["days"]
+    if date in days:
+        data = days[date]
+        data["revenue"] += amount
+        data["transaction_count"] += 1
+        data["customers"].add(customer)
+    else:
+        days[date] = {"revenue": amount, "transaction_count": 1, "customers": {customer}}
+
+    return partial
+
+
+def build_partial(transactions):
+    partial = new_partial()
+    for transaction in transactions:
+        add_transaction(partial, transaction)
+    return partial
+
+
+def _merge_group(target, source):
+    # Add counters and exact sums, union sets;
+    # keys unseen so far are appended in source order
+    for key, values in source.items():
+        if key not in target:
+            target[key] = {name: (set(value) if isinstance(value, set) else value) for name, value in values.items()}
+            continue
+
+        for name, value in values.items():
+            if isinstance(value, set):
+                target[key][name] |= value
+            else:
+                target[key][name] += value
+
+
+def _merge_into(target, partial):
+    target["total_revenue"] += partial["total_revenue"]
+    target["transaction_count"] += partial["transaction_count"]
+    for group in ("regions", "products", "customers", "days"):
+        _merge_group(target[group], partial[group])
+
+
+def merge_partials(left, right):
+    # Returns a new partial; neither input is modified
+    return reduce_partials([left, right])
+
+
+def reduce_partials(partials):
+    result = new_partial()
+    for partial in partials:
+        _merge_into(result, partial)
+    return result
+
+
+def aggregate_in_parallel(transactions, shards=4):
+    # Map-reduce over contiguous shards on separate processes
+    if not transactions:
+        return new_partial()
+
+    shard_size = -(-len(transactions) // shards)
+    chunks = [transactions[i:i + shard_size] for i in range(0, len(transactions), shard_size)]
+
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        partials = list(executor.map(build_partial, chunks))
+
+    return reduce_partials(partials)
+
+
+# SERIALIZATION
+
+def serialize_partial(partial):
+    # JSON text; sets are stored as sorted lists (and integer day keys become strings).
+    # Exact sums are ints, which JSON round-trips without loss.
+    def encode(value):
+        if isinstance(value, set):
+            return sorted(value)
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    return json.dumps(partial, default=encode)
+
+
+def deserialize_partial(text):
+    partial = json.loads(text)
+
+    for customer in partial["customers"].values():
+        customer["products_bought"] = set(customer["products_bought"])
+    partial["days"] = {int(date): day for date, day in partial["days"].items()}
+    for day in partial["days"].values():
+        day["customers"] = set(day["customers"])
+
+    return partial
+
+
+# FINAL RESULTS (same shape as the data_processor.py functions)
+
+def finalize_total_revenue(partial):
+    return sum_value(partial["total_revenue"])
+
+
+def finalize_region_sales(partial):
+    sales_summary = {}
+    overall_total = sum_value(partial["total_revenue"])
+
+    for region, data in partial["regions"].items():
+        total_sales = sum_value(data["total_sales"])
+        sales_summary[region] = {
+            "total_sales": total_sales,
+            "transaction_count": data["transaction_count"],
+            "percentage": (total_sales / overall_total) * 100,
+        }
+
+    return dict(sorted(sales_summary.items(), key=lambda item: item[1]["total_sales"], reverse=True))
+
+
+def finalize_top_products(partial, n=5):
+    product_list = [
+        (productName, details["total_quantity"], sum_value(details["total_revenue"]))
+        for productName, details in partial["products"].items()
+    ]
+    product_list.sort(key=lambda item: item[1], reverse=True)
+    return product_list[:n]
+
+
+def finalize_customer_analysis(partial):
+    customer_summary = {}
+
+    for customer, data in partial["customers"].items():
+        total_spent = sum_value(data["total_spent"])
+        customer_summary[customer] = {
+            "total_spent": total_spent,
+            "purchase_count": data["purchase_count"],
+            "products_bought": set(data["products_bought"]),
+            "avg_order_value": total_spent / data["purchase_count"],
+        }
+
+    return dict(sorted(customer_summary.items(), key=lambda item: item[1]["total_spent"], reverse=True))
+
+
+def finalize_daily_trend(partial):
+    daily_summary = {}
+
+    for date, data in sorted(partial["days"].items()):
+        daily_summary[format_date(date)] = {
+            "revenue": sum_value(data["revenue"]),
+            "transaction_count": data["transaction_count"],
+            "unique_customers": len(data["customers"]),
+        }
+
+    return daily_summary
+
+
+def finalize_peak_sales_day(partial):
+    peak_date = None
+    peak_revenue = 0
+    peak_transcation = 0
+
+    for date, data in partial["days"].items():
+        revenue = sum_value(data["revenue"])
+        if revenue > peak_revenue:
+            peak_revenue = revenue
+            peak_date = format_date(date)
+            peak_transcation = data["transaction_count"]
+
+    return (peak_date, peak_revenue, peak_transcation)
+
+
+def finalize_low_products(partial, threshold=10):
+    low_products = [
+        (productName, details["total_quantity"], sum_value(details["total_revenue"]))
+        for productName, details in partial["products"].items()
+        if details["total_quantity"] < threshold
+    ]
+    low_products.sort(key=lambda item: item[1])
+    return low_products
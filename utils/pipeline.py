@@ -0,0 +1,217 @@
+import queue
+import threading
+import time
+
+from utils.file_handler import iter_sales_data, parse_transactions, build_filters, atomic_write
+from utils.validation_rules import apply_rules
+from utils.partial_aggregates import new_partial, add_transaction
+from utils.api_handler import (ENRICHED_HEADERS, format_enriched_row, enrich_sales_data, new_enrichment_summary,
+                               add_enrichment_summary, write_sales_report)
+from utils.enrichment_index import build_enrichment_index
+
+# Backpressured producer/consumer runtime.
+#
+# Every stage runs in its own thread and hands batches of rows to the next one
+# through a bounded queue. When a downstream stage falls behind, its input queue
+# fills up and the upstream put() blocks, so rows in flight stay bounded by
+# (stages x maxsize x batch_size) no matter how large the input is. Stages that
+# need the whole data set (see run_sales_pipeline) must fold rows into state
+# sized by distinct keys rather than collect them.
+#
+# A stage is (name, transform) where transform takes an iterator of input
+# batches and yields output batches, so it can keep state or open a file around
+# the loop. Threads overlap file I/O with processing; CPU-bound work still
+# shares the GIL.
+
+_DONE = object()
+_ABORT = object()
+
+
+def _new_stage_stats():
+    return {
+        "rows_in": 0,
+        "rows_out": 0,
+        "batches_out": 0,
+        "queue_depth": 0,
+        "max_queue_depth": 0,
+        "seconds": 0.0,
+        "rows_per_sec": 0.0,
+    }
+
+
+def _read_queue(input_queue, stage_stats):
+    while True:
+        batch = input_queue.get()
+        stage_stats["queue_depth"] = input_queue.qsize()
+        if batch is _DONE:
+            return
+        if batch is _ABORT:
+            # Fail this stage too, so e.g. the writer never renames a partial file into place
+            raise RuntimeError("Upstream pipeline stage failed")
+        stage_stats["rows_in"] += len(batch)
+        yield batch
+
+
+def _run_stage(transform, batches, output_queue, stage_stats, errors, output_stats=None):
+    # output_stats: stats of the stage reading output_queue, which records the
+    # depth of its input queue as seen right after each put()
+    start = time.perf_counter()
+    failed = False
+
+    try:
+        for batch in transform(batches):
+            stage_stats["rows_out"] += len(batch)
+            stage_stats["batches_out"] += 1
+            if output_queue is not None:
+                output_queue.put(batch)
+                depth = output_queue.qsize()
+                output_stats["queue_depth"] = depth
+                if depth > output_stats["max_queue_depth"]:
+                    output_stats["max_queue_depth"] = depth
+
+    except Exception as e:
+        errors.append(e)
+        failed = True
+        # Keep draining the input so upstream stages never block on a full queue
+        for _ in batches:
+            pass
+
+    finally:
+        stage_stats["seconds"] = time.perf_counter() - start
+        if stage_stats["seconds"]:
+            stage_stats["rows_per_sec"] = stage_stats["rows_out"] / stage_stats["seconds"]
+        if output_queue is not None:
+            output_queue.put(_ABORT if failed else _DONE)
+
+
+def run_pipeline(source, stages, maxsize=8, stats=None):
+    # source: iterable of batches; stages: list of (name, transform).
+    # `stats` (optional dict) is filled with live per-stage counters and can be
+    # read from another thread while the pipeline runs.
+    # Returns the stats dict; re-raises the first stage error, if any.
+    stats = {} if stats is None else stats
+    errors = []
+
+    queues = [queue.Queue(maxsize=maxsize) for _ in stages]
+    threads = []
+
+    stats["source"] = _new_stage_stats()
+    for name, _ in stages:
+        stats[name] = _new_stage_stats()
+
+    # Source stage feeds the first queue
+    threads.append(threading.Thread(
+        target=_run_stage,
+        args=(lambda batches: batches, iter(source), queues[0], stats["source"], errors, stats[stages[0][0]]),
+        name="pipeline-source",
+    ))
+
+    for i, (name, transform) in enumerate(stages):
+        output_queue, output_stats = (queues[i + 1], stats[stages[i + 1][0]]) if i + 1 < len(stages) else (None, None)
+        batches = _read_queue(queues[i], stats[name])
+        threads.append(threading.Thread(
+            target=_run_stage,
+            args=(transform, batches, output_queue, stats[name], errors, output_stats),
+            name=f"pipeline-{name}",
+        ))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return stats
+
+
+# SALES PIPELINE STAGES: read -> parse -> validate/filter -> aggregate & enrich -> write
+
+def run_sales_pipeline(filename, product_mapping, enrichment_index=None,
+                       region=None, min_amount=None, max_amount=None, start_date=None, end_date=None,
+                       enriched_file='data/enriched_sales_data.txt', report_file='output/sales_report.txt',
+                       batch_size=1000, maxsize=8, stats=None):
+    # Streaming equivalent of the batch path in main.py (read_sales_data ->
+    # parse_transactions -> validate_and_filter -> enrich_sales_data ->
+    # save_enriched_data + generate_sales_report) with identical output files.
+    # No rows are kept: the report is built from the streamed partial aggregate
+    # and enrichment counts. A missing or empty input file raises, and the
+    # enriched file is then left untouched and no report is written.
+    filters = build_filters(region, min_amount, max_amount, start_date, end_date)
+    if enrichment_index is None:
+        enrichment_index = build_enrichment_index(product_mapping, title_keys=False)
+
+    summary = {
+        'total_input': 0,
+        'invalid': 0,
+        'invalid_by_rule': {},
+        'filtered_by_region': 0,
+        'filtered_by_amount': 0,
+        'filtered_by_date': 0,
+        'final_count': 0
+    }
+    partial = new_partial()
+    enrichment = new_enrichment_summary()
+
+    def parse_stage(batches):
+        line_no = 1
+        for lines in batches:
+            yield parse_transactions(lines, first_line_no=line_no)
+            line_no += len(lines)
+
+    def validate_stage(batches):
+        for transactions in batches:
+            summary['total_input'] += len(transactions)
+
+            valid_transactions, rejections = apply_rules(transactions)
+            summary['invalid'] += len(transactions) - len(valid_transactions)
+            for rule_name, count in rejections.items():
+                summary['invalid_by_rule'][rule_name] = summary['invalid_by_rule'].get(rule_name, 0) + count
+
+            for summary_key, keep in filters.items():
+                before = len(valid_transactions)
+                valid_transactions = [transaction for transaction in valid_transactions if keep(transaction)]
+                summary[summary_key] += before - len(valid_transactions)
+
+            summary['final_count'] += len(valid_transactions)
+            yield valid_transactions
+
+    def enrich_stage(batches):
+        match_cache = {}
+        for transactions in batches:
+            for transaction in transactions:
+                add_transaction(partial, transaction)
+            enriched = enrich_sales_data(transactions, product_mapping, enrichment_index, match_cache)
+            add_enrichment_summary(enrichment, enriched)
+            yield enriched
+
+    def write_stage(batches):
+        with atomic_write(enriched_file) as file:
+            file.write("|".join(ENRICHED_HEADERS) + "\n")
+            for enriched in batches:
+                file.write("".join(format_enriched_row(transaction) for transaction in enriched))
+                yield enriched
+        print(f"SUCCESS: Enriched data saved to {enriched_file}")
+
+    stats = run_pipeline(
+        iter_sales_data(filename, batch_size),
+        [
+            ("parse", parse_stage),
+            ("validate", validate_stage),
+            ("enrich", enrich_stage),
+            ("write", write_stage),
+        ],
+        maxsize=maxsize,
+        stats=stats,
+    )
+
+    # The report covers the whole data set, so it is written once the stream has drained
+    write_sales_report(partial, enrichment, report_file)
+
+    return {
+        "summary": summary,
+        "partial": partial,
+        "enrichment": enrichment,
+        "stats": stats,
+    }
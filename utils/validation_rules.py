@@ -0,0 +1,153 @@
+from utils.date_keys import parse_date
+
+REQUIRED_FIELDS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region"
+]
+
+# Declarative validation rules, checked in order.
+# A record that breaks several rules is counted against the first one only,
+# so the per-rule counts always add up to the total invalid count.
+VALIDATION_RULES = [
+    {"name": "invalid_quantity", "type": "positive", "fields": ["Quantity"]},
+    {"name": "invalid_unit_price", "type": "positive", "fields": ["UnitPrice"]},
+    {"name": "missing_field", "type": "required", "fields": REQUIRED_FIELDS},
+    {"name": "invalid_transaction_id", "type": "prefix", "fields": ["TransactionID"], "prefix": "T"},
+    {"name": "invalid_product_id", "type": "prefix", "fields": ["ProductID"], "prefix": "P"},
+    {"name": "invalid_customer_id", "type": "prefix", "fields": ["CustomerID"], "prefix": "C"},
+    {"name": "invalid_date", "type": "date", "fields": ["Date"]},
+]
+
+
+def _value_expression(rule, value, fast=False):
+    # Source for one rule's check on the variable `value`, inlined by the
+    # compilers below. Plain expressions never raise; fast=True may swap in a
+    # cheaper form that raises TypeError for values of the wrong type, which the
+    # caller must treat as a failure.
+    rule_type = rule["type"]
+
+    if rule_type == "positive":
+        return f"(type({value}) is int or type({value}) is float) and {value} > 0"
+
+    if rule_type == "required":
+        return f"{value} is not None and {value} != ''"
+
+    if rule_type == "prefix":
+        prefix = rule["prefix"]
+        if fast:
+            # Slicing is cheaper than a startswith() call and raises for non-strings
+            return f"{value}[:{len(prefix)}] == {prefix!r}"
+        return f"type({value}) is str and {value}.startswith({prefix!r})"
+
+    if rule_type == "date":
+        # YYYY-MM-DD and an actual calendar date (cached parser); the fast form
+        # first checks the dates already seen valid in this call (a set lookup, no call)
+        if fast:
+            return f"{value} in valid_dates or remember_date({value}, valid_dates)"
+        return f"parse_date({value}) is not None"
+
+    raise ValueError(f"Unknown validation rule type: {rule_type}")
+
+
+def _remember_date(text, valid_dates):
+    if parse_date(text) is None:
+        return False
+    valid_dates.add(text)
+    return True
+
+
+def _compile(source, name, **names):
+    namespace = {"parse_date": parse_date, "remember_date": _remember_date, **names}
+    exec(source, namespace)
+    return namespace[name]
+
+
+def _compile_splitter(rules):
+    # Generate one specialised function for the whole rule set: each field is
+    # read once by direct indexing and every check is inlined into one boolean
+    # expression inside the row loop, so a valid row costs no Python calls
+    # once its date string has been seen. Only a rejected row then walks the rules
+    # in order, on the values already read, to count the first one it broke.
+    # The function returns (valid rows, {rule name: rejected count}).
+    variables = {}
+    checks = []
+    attribution = []
+
+    # A "required" check is redundant for fields another rule already type-checks
+    typed_fields = {
+        field
+        for rule in rules
+        if rule["type"] in ("positive", "date") or (rule["type"] == "prefix" and rule["prefix"])
+        for field in rule["fields"]
+    }
+
+    for rule in rules:
+        for field in rule["fields"]:
+            value = variables.setdefault(field, f"v{len(variables)}")
+            keyword = "elif" if attribution else "if"
+            attribution.append(
+                f"        {keyword} not ({_value_expression(rule, value)}):\n"
+                f"            rejections[{rule['name']!r}] += 1\n"
+            )
+            if rule["type"] == "required" and field in typed_fields:
+                continue
+            checks.append(f"({_value_expression(rule, value, fast=True)})")
+
+    reads = "".join(f"            {value} = transaction[{field!r}]\n" for field, value in variables.items())
+    source = (
+        "def split_valid(transactions):\n"
+        "    valid = []\n"
+        "    rejections = dict.fromkeys(names, 0)\n"
+        "    valid_dates = set()\n"
+        "    for transaction in transactions:\n"
+        "        try:\n"
+        f"{reads}"
+        f"            passed = {' and '.join(checks) or 'True'}\n"
+        "        except (KeyError, TypeError):\n"
+        "            # Missing field or wrong type: attribute with .get() semantics\n"
+        "            rejections[failed_rule(transaction)] += 1\n"
+        "            continue\n"
+        "        if passed:\n"
+        "            valid.append(transaction)\n"
+        "            continue\n"
+        f"{''.join(attribution)}"
+        "    return valid, rejections\n"
+    )
+    return _compile(source, "split_valid", names=[rule["name"] for rule in rules],
+                    failed_rule=_compile_attribution(rules))
+
+
+def _compile_attribution(rules):
+    # Generate the rules in order as a chain of checks returning the name of the
+    # first one a record breaks (missing fields read as None), or None
+    lines = ["def failed_rule(transaction):", "    get = transaction.get"]
+
+    for rule in rules:
+        for field in rule["fields"]:
+            lines.append(f"    value = get({field!r})")
+            lines.append(f"    if not ({_value_expression(rule, 'value')}):")
+            lines.append(f"        return {rule['name']!r}")
+
+    lines.append("    return None")
+    return _compile("\n".join(lines) + "\n", "failed_rule")
+
+
+def compile_rules(rules=VALIDATION_RULES):
+    # Fast whole-set row splitter, plus the ordered check used to name the failed rule
+    return {
+        "split_valid": _compile_splitter(rules),
+        "failed_rule": _compile_attribution(rules),
+    }
+
+
+COMPILED_RULES = compile_rules()
+
+
+def failed_rule(transaction, compiled_rules=COMPILED_RULES):
+    # Name of the first rule the record breaks, or None if it is valid
+    return compiled_rules["failed_rule"](transaction)
+
+
+def apply_rules(transactions, compiled_rules=COMPILED_RULES):
+    # (valid transactions, {rule name: rejected count})
+    return compiled_rules["split_valid"](transactions)
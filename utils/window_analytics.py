@@ -0,0 +1,150 @@
+from collections import deque
+from itertools import accumulate
+from operator import sub
+
+from utils.date_keys import parse_date, format_date, date_key
+from utils.exact_sum import to_exact, sum_value
+
+# Sliding-window analytics on daily revenue.
+# Revenue is bucketed by integer date key (DateOrdinal), so consecutive keys are
+# consecutive calendar days and no date strings are parsed along the way.
+# Everything works on a dense, date-indexed series (days with no sales are 0),
+# so every window of N days is exactly N entries and each metric is a single
+# O(n) pass: exact prefix sums for rolling totals, a monotonic deque for rolling peaks.
+
+
+def _add_daily_revenue(revenue_by_day, transaction):
+    # Exact revenue sum per date key; rows without a valid date or amount are skipped
+    try:
+        day = date_key(transaction)
+        amount = to_exact(transaction['Quantity'] * transaction['UnitPrice'])
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+    revenue_by_day[day] = revenue_by_day.get(day, 0) + amount
+    return day
+
+
+def _dense_series(revenue_by_day, first, last):
+    # (dates, revenues) with one entry per calendar day from date key first to last
+    dates = [format_date(day) for day in range(first, last + 1)]
+    revenues = [sum_value(revenue_by_day[day]) if day in revenue_by_day else 0.0 for day in range(first, last + 1)]
+    return dates, revenues
+
+
+def daily_revenue_series(transactions, start_date=None, end_date=None):
+    # Returns (dates, revenues) with one entry per calendar day from start to end
+    revenue_by_day = {}
+    for transaction in transactions:
+        _add_daily_revenue(revenue_by_day, transaction)
+
+    if not revenue_by_day and (start_date is None or end_date is None):
+        return [], []
+
+    first = parse_date(start_date) if start_date else min(revenue_by_day)
+    last = parse_date(end_date) if end_date else max(revenue_by_day)
+    if first is None or last is None:
+        raise ValueError(f"Invalid date range: {start_date!r} to {end_date!r}")
+
+    return _dense_series(revenue_by_day, first, last)
+
+
+def rolling_sums(values, window):
+    # Sum of the last `window` values ending at each position (shorter at the start).
+    # Prefix sums are kept exact as ints counting units of the finest denominator in
+    # the series, so each window total is a difference of two ints rounded once:
+    # the correctly rounded window sum (plain float prefix differences drift on cent values).
+    ratios = [value.as_integer_ratio() for value in values]
+    scale = max((denominator for _, denominator in ratios), default=1)
+    prefix = list(accumulate([numerator * (scale // denominator) for numerator, denominator in ratios], initial=0))
+
+    head = [total / scale for total in prefix[1:window]]
+    return head + [total / scale for total in map(sub, prefix[window:], prefix)]
+
+
+def moving_averages(values, window):
+    # Average per day over the window; leading positions average over the days available
+    sums = rolling_sums(values, window)
+    return [total / min(i + 1, window) for i, total in enumerate(sums)]
+
+
+def rolling_peaks(values, window):
+    # Index of the highest value within the last `window` values at each position
+    candidates = deque()
+    peaks = []
+
+    for i, value in enumerate(values):
+        # Drop smaller values from the back, they can never be a peak again
+        while candidates and values[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(i)
+
+        # Drop the front once it falls out of the window
+        if candidates[0] <= i - window:
+            candidates.popleft()
+
+        peaks.append(candidates[0])
+
+    return peaks
+
+
+def peak_window(dates, values, window):
+    # Highest-revenue run of `window` consecutive days: (start_date, end_date, revenue)
+    if not values:
+        return (None, None, 0.0)
+
+    sums = rolling_sums(values, window)
+
+    # Only complete windows compete, unless the series is shorter than one window
+    first_full = min(window, len(values)) - 1
+    best = max(range(first_full, len(values)), key=lambda i: sums[i])
+    start = max(0, best - window + 1)
+
+    return (dates[start], dates[best], sums[best])
+
+
+def rolling_analytics(transactions, windows=(7, 30), start_date=None, end_date=None):
+    dates, revenues = daily_revenue_series(transactions, start_date, end_date)
+    return _window_metrics(dates, revenues, windows)
+
+
+def _window_metrics(dates, revenues, windows):
+    result = {
+        "dates": dates,
+        "revenue": revenues,
+        "windows": {},
+    }
+
+    for window in windows:
+        peak_days = rolling_peaks(revenues, window)
+        result["windows"][window] = {
+            "rolling_revenue": rolling_sums(revenues, window),
+            "moving_average": moving_averages(revenues, window),
+            "peak_day": [dates[i] for i in peak_days],
+            "peak_window": peak_window(dates, revenues, window),
+        }
+
+    return result
+
+
+def rolling_analytics_by(transactions, field, windows=(7, 30)):
+    # Windowed analytics per Region / ProductName / ... on a shared date axis.
+    # Daily revenue is bucketed per group in a single pass, so the total work
+    # stays O(n + groups x days).
+    groups = {}
+    first = last = None
+    for transaction in transactions:
+        revenue_by_day = groups.setdefault(transaction[field], {})
+        day = _add_daily_revenue(revenue_by_day, transaction)
+        if day is None:
+            continue
+        first = day if first is None else min(first, day)
+        last = day if last is None else max(last, day)
+
+    if first is None:
+        return {}
+
+    return {
+        key: _window_metrics(*_dense_series(revenue_by_day, first, last), windows)
+        for key, revenue_by_day in groups.items()
+    }